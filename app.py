@@ -1,42 +1,77 @@
 import os
 import json
+import re
 import threading
 from datetime import datetime
 from functools import wraps
 from flask import Flask, render_template, jsonify, request
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from church_matcher import deduplicate_churches, haversine_km, is_church_id
+from search_index import SearchIndex
 
 app = Flask(__name__)
 app.debug = True  # Enable debug mode
 
 # Constants
 SPREADSHEET_ID = os.getenv('SPREADSHEET_ID')
-print(f"Loaded SPREADSHEET_ID: {SPREADSHEET_ID}")  # Debug print
-RANGE_NAME = "'Churches'!A2:F"  # Changed from Sheet1 to Churches and added quotes
+RANGE_NAME = "'Churches'!A2:H"  # Changed from Sheet1 to Churches and added quotes
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
 
 # Cache variables
 churches_cache = None
 last_fetch_time = None
+search_index = None
 cache_lock = threading.Lock()
 
+# Sheets client and credentials, built once per process on first use.
+# httplib2 is not thread-safe, so each thread gets its own authorized http.
+sheets_credentials = None
+sheets_service = None
+service_lock = threading.Lock()
+thread_local = threading.local()
+
+def get_spreadsheet_id():
+    global SPREADSHEET_ID
+    if not SPREADSHEET_ID:
+        # Only local setups rely on a .env file, so dotenv is loaded on demand
+        from dotenv import load_dotenv
+        load_dotenv()
+        SPREADSHEET_ID = os.getenv('SPREADSHEET_ID')
+        print(f"Loaded SPREADSHEET_ID: {SPREADSHEET_ID}")  # Debug print
+    return SPREADSHEET_ID
+
 def get_google_sheets_service():
-    try:
-        credentials = service_account.Credentials.from_service_account_file(
-            'service-account.json', scopes=SCOPES)
-        service = build('sheets', 'v4', credentials=credentials)
-        return service.spreadsheets()
-    except Exception as e:
-        print(f"Error creating Google Sheets service: {e}")
-        return None
+    global sheets_credentials, sheets_service
+    with service_lock:
+        if sheets_service is not None:
+            return sheets_service
+        try:
+            # Imported lazily to keep the google client libraries out of web startup
+            from google.oauth2 import service_account
+            from googleapiclient.discovery import build
+
+            credentials = service_account.Credentials.from_service_account_file(
+                'service-account.json', scopes=SCOPES)
+            service = build('sheets', 'v4', credentials=credentials, cache_discovery=False)
+            sheets_credentials = credentials
+            sheets_service = service.spreadsheets()
+            return sheets_service
+        except Exception as e:
+            print(f"Error creating Google Sheets service: {e}")
+            return None
+
+def get_authorized_http():
+    """Return this thread's authorized http for executing Sheets requests."""
+    http = getattr(thread_local, 'http', None)
+    if http is None:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+
+        http = AuthorizedHttp(sheets_credentials, http=httplib2.Http())
+        thread_local.http = http
+    return http
 
 def fetch_churches_from_sheets(force_refresh=False):
-    global churches_cache, last_fetch_time
+    global churches_cache, last_fetch_time, search_index
     
     print(f"Fetching churches (force_refresh={force_refresh})")  # Debug print
     
@@ -52,11 +87,12 @@ def fetch_churches_from_sheets(force_refresh=False):
             print("Failed to get Google Sheets service")  # Debug print
             return []
 
-        print(f"Fetching data from sheet {SPREADSHEET_ID} range {RANGE_NAME}")  # Debug print
+        spreadsheet_id = get_spreadsheet_id()
+        print(f"Fetching data from sheet {spreadsheet_id} range {RANGE_NAME}")  # Debug print
         sheet = service.values().get(
-            spreadsheetId=SPREADSHEET_ID,
+            spreadsheetId=spreadsheet_id,
             range=RANGE_NAME
-        ).execute()
+        ).execute(http=get_authorized_http())
         values = sheet.get('values', [])
         print(f"Fetched {len(values)} rows from sheet")  # Debug print
 
@@ -72,18 +108,25 @@ def fetch_churches_from_sheets(force_refresh=False):
                         "lng": float(row[5].strip()),  # Changed from index 3 to 5
                     }
                     # Add last_updated if available
-                    if len(row) > 6:
+                    if len(row) > 6 and row[6].strip():
                         church["last_updated"] = row[6].strip()
+                    # Keep the canonical ID written by the scraper
+                    if len(row) > 7 and is_church_id(row[7]):
+                        church["id"] = row[7].strip()
                     churches.append(church)
                 except (ValueError, IndexError) as e:
                     print(f"Error processing row {i+2}: {row}")  # Debug print (i+2 because we start from A2)
                     print(f"Error details: {str(e)}")  # Debug print
                     continue
 
+        # Collapse name variants and assign canonical IDs
+        churches = deduplicate_churches(churches)
+
         # Update cache
         with cache_lock:
             churches_cache = churches
             last_fetch_time = datetime.now()
+            search_index = SearchIndex(churches)
             print(f"Updated cache with {len(churches)} churches")  # Debug print
 
         return churches
@@ -105,6 +148,39 @@ SAMPLE_CHURCHES = [
     }
 ]
 
+# "5:30", "5.30", "18h", "6g30", "6 giờ 30" but not the "7:" in "Thứ 7: 5:00"
+MASS_TIME_PATTERN = re.compile(
+    r'(?<![\d:.])(\d{1,2})(?:[:.](\d{2})|\s*(?:giờ|g|h)(?:\s*(\d{2}))?)(?!\w)',
+    re.IGNORECASE
+)
+
+def parse_mass_times(mass_times):
+    """Return mass times as minutes after midnight."""
+    minutes = []
+    for hours, mins, suffix_mins in MASS_TIME_PATTERN.findall(mass_times or ''):
+        hours, mins = int(hours), int(mins or suffix_mins or 0)
+        if hours < 24 and mins < 60:
+            minutes.append(hours * 60 + mins)
+    return minutes
+
+def parse_time_slot(time_slot):
+    """Parse a requested time like "17:30" or a bare hour like "18"."""
+    time_slot = time_slot.strip()
+    if time_slot.isdigit():
+        hours = int(time_slot)
+        return hours * 60 if hours < 24 else None
+    minutes = parse_mass_times(time_slot)
+    return minutes[0] if minutes else None
+
+def get_search_index():
+    """Return the search index for the cached churches, loading them if needed."""
+    churches = fetch_churches_from_sheets()
+    with cache_lock:
+        if churches and search_index is not None:
+            return search_index
+    # Index the sample data when the sheet is unavailable
+    return SearchIndex(deduplicate_churches(SAMPLE_CHURCHES))
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -138,6 +214,63 @@ def refresh_data():
         print(traceback.format_exc())  # Print full stack trace
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/churches/search', methods=['GET'])
+def search_churches():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"success": False, "error": "Missing search query"}), 400
+
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        radius_km = request.args.get('radius', default=5, type=float)
+        time_slot = request.args.get('time')
+        limit = max(1, request.args.get('limit', default=50, type=int))
+
+        target_minutes = None
+        if time_slot:
+            target_minutes = parse_time_slot(time_slot)
+            if target_minutes is None:
+                return jsonify({"success": False, "error": "Invalid time, expected HH:MM"}), 400
+
+        results = []
+        for church, score in get_search_index().search(query):
+            church = dict(church, score=score)
+
+            if lat is not None and lng is not None:
+                distance = haversine_km(lat, lng, church['lat'], church['lng'])
+                if distance > radius_km:
+                    continue
+                church['distance'] = round(distance, 1)
+
+            # Keep churches with a mass within 1 hour of the selected time
+            if target_minutes is not None and not any(
+                    abs(minutes - target_minutes) <= 60
+                    for minutes in parse_mass_times(church.get('mass_times'))):
+                continue
+
+            results.append(church)
+
+        # Ranked by relevance, nearer churches first on equal scores
+        results.sort(key=lambda c: (-c['score'], c.get('distance', 0)))
+        return jsonify({"success": True, "churches": results[:limit]})
+    except Exception as e:
+        print(f"Error in search_churches: {str(e)}")  # Debug print
+        import traceback
+        print(traceback.format_exc())  # Print full stack trace
+        return jsonify({"success": False, "error": str(e)})
+
+def warm_cache_in_background():
+    """Load the sheet in a daemon thread so boot does not wait on Google APIs.
+
+    Called from the gunicorn worker hook, never at import time.
+    """
+    if os.getenv('WARM_CACHE', '1') == '0':
+        return
+    threading.Thread(target=fetch_churches_from_sheets, daemon=True).start()
+
 if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
     port = int(os.environ.get('PORT', 5004))  # Changed default port to 5004
     app.run(host='0.0.0.0', port=port, debug=True)
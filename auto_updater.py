@@ -1,8 +1,16 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from church_list_scraper import ChurchListScraper
 import logging
-from datetime import datetime
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
 import pytz
 
 # Set up logging
@@ -16,43 +24,213 @@ logging.basicConfig(
 )
 logger = logging.getLogger('auto_updater')
 
+JOB_ID = 'update_church_data'
+LOCK_PATH = os.getenv('UPDATER_LOCK_PATH', 'auto_updater.lock.db')
+INTERVAL_HOURS = float(os.getenv('UPDATE_INTERVAL_HOURS', 1))
+JITTER_SECONDS = int(os.getenv('UPDATE_JITTER_SECONDS', 300))
+# The lease is renewed every LEASE_TTL_SECONDS / 3 while a crawl runs
+LEASE_TTL_SECONDS = int(os.getenv('UPDATER_LEASE_TTL_SECONDS', 600))
+
+
+class LeaseLock:
+    """SQLite-backed lease shared by every process that can see the lock file.
+
+    The holder renews the lease while it works, and a lease that is not
+    renewed expires after ttl_seconds so a crashed holder cannot block
+    updates forever. The start time of the last run is stored with the
+    lease, so staggered schedulers in several processes still produce a
+    single crawl per interval.
+    """
+
+    def __init__(self, path, name, ttl_seconds):
+        self.path = path
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS leases ('
+                'name TEXT PRIMARY KEY, owner TEXT, expires_at REAL, last_run_at REAL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def acquire(self, min_interval_seconds):
+        """Take the lease. Returns False if held or a run started too recently."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so check-and-set is atomic
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT owner, expires_at, last_run_at FROM leases WHERE name = ?',
+                (self.name,)
+            ).fetchone()
+            if row:
+                owner, expires_at, last_run_at = row
+                if expires_at > now:
+                    conn.execute('ROLLBACK')
+                    return False
+                if last_run_at is not None and now - last_run_at < min_interval_seconds:
+                    conn.execute('ROLLBACK')
+                    return False
+            conn.execute(
+                'INSERT OR REPLACE INTO leases (name, owner, expires_at, last_run_at) '
+                'VALUES (?, ?, ?, ?)',
+                (self.name, self.owner, now + self.ttl_seconds, now)
+            )
+            conn.execute('COMMIT')
+            return True
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def renew(self):
+        """Extend the lease. Returns False if this process no longer holds it."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                'UPDATE leases SET expires_at = ? '
+                'WHERE name = ? AND owner = ? AND expires_at > ?',
+                (time.time() + self.ttl_seconds, self.name, self.owner, time.time())
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def release(self):
+        """Release the lease, leaving it alone if another process now holds it."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                'UPDATE leases SET expires_at = 0 WHERE name = ? AND owner = ?',
+                (self.name, self.owner)
+            )
+        finally:
+            conn.close()
+
+
+class LeaseHeartbeat:
+    """Renew a lease from a background thread for the duration of a with block.
+
+    Sets the lost event once a renewal fails, so the crawl can avoid
+    writing after another process may have taken over.
+    """
+
+    def __init__(self, lock):
+        self.lock = lock
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.lock.ttl_seconds / 3):
+            try:
+                if not self.lock.renew():
+                    logger.error("Lost the update lease while a crawl was running")
+                    self.lost.set()
+                    return
+            except Exception as e:
+                logger.error(f"Error renewing update lease: {str(e)}")
+
+    def still_held(self):
+        """Renew the lease now and report whether this process still holds it."""
+        if self.lost.is_set():
+            return False
+        try:
+            if self.lock.renew():
+                return True
+        except Exception as e:
+            logger.error(f"Error renewing update lease: {str(e)}")
+        self.lost.set()
+        return False
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
 class ChurchDataUpdater:
-    def __init__(self):
-        self.scraper = ChurchListScraper()
-        self.scheduler = BackgroundScheduler()
+    def __init__(self, interval_hours=INTERVAL_HOURS, jitter_seconds=JITTER_SECONDS,
+                 lock_path=LOCK_PATH, lease_ttl_seconds=LEASE_TTL_SECONDS, blocking=False):
+        self.scraper = None
+        self.interval = timedelta(hours=interval_hours)
+        self.jitter_seconds = jitter_seconds
+        self.lock = LeaseLock(lock_path, JOB_ID, ttl_seconds=lease_ttl_seconds)
+        self.scheduler = BlockingScheduler() if blocking else BackgroundScheduler()
         self.vietnam_tz = pytz.timezone('Asia/Ho_Chi_Minh')
 
+    def _min_run_gap(self):
+        # Runs fire up to jitter_seconds late, so allow that much slack
+        return max(0, self.interval.total_seconds() - self.jitter_seconds)
+
     def update_data(self):
-        """Update church data from giothanhle.net."""
+        """Update church data from giothanhle.net if no other process is."""
+        try:
+            if not self.lock.acquire(self._min_run_gap()):
+                logger.info("Skipping update: already running or done elsewhere this interval")
+                return
+        except Exception as e:
+            logger.error(f"Error acquiring update lock: {str(e)}")
+            return
+
         try:
             current_time = datetime.now(self.vietnam_tz).strftime('%Y-%m-%d %H:%M:%S')
             logger.info(f"Starting data update at {current_time}")
-            
-            updated_count = self.scraper.run()
+
+            # Created lazily so only the process that wins the lease loads the scraper
+            if self.scraper is None:
+                self.scraper = ChurchListScraper()
+            with LeaseHeartbeat(self.lock) as heartbeat:
+                # The sheet is only rewritten while this process holds the lease
+                updated_count = self.scraper.run(can_write=heartbeat.still_held)
             logger.info(f"Successfully updated {updated_count} churches")
-            
+
         except Exception as e:
             logger.error(f"Error updating data: {str(e)}")
+        finally:
+            self.lock.release()
 
-    def start(self):
-        """Start the scheduler."""
+    def start(self, run_immediately=True):
+        """Start the scheduler.
+
+        The first run is delayed by a random jitter so processes started
+        together do not all race for the lease at the same moment.
+        """
         try:
-            # Add job to run every hour
+            first_run = datetime.now(self.scheduler.timezone)
+            if self.jitter_seconds:
+                first_run += timedelta(seconds=random.uniform(0, self.jitter_seconds))
+            if not run_immediately:
+                first_run += self.interval
+
             self.scheduler.add_job(
                 func=self.update_data,
-                trigger=IntervalTrigger(hours=1),
-                id='update_church_data',
+                trigger=IntervalTrigger(seconds=self.interval.total_seconds(),
+                                        jitter=self.jitter_seconds or None),
+                id=JOB_ID,
                 name='Update church data from giothanhle.net',
-                replace_existing=True
+                replace_existing=True,
+                next_run_time=first_run,
+                max_instances=1,  # Never overlap a slow run with the next one
+                coalesce=True,  # Collapse missed runs into a single catch-up run
+                misfire_grace_time=int(self.interval.total_seconds() // 2)
             )
-            
-            # Start the scheduler
+
+            logger.info(f"Scheduler starting, first update at {first_run}")
+            # Blocks here when running as a standalone worker
             self.scheduler.start()
-            logger.info("Scheduler started successfully")
-            
-            # Run initial update
-            self.update_data()
-            
+
+        except (KeyboardInterrupt, SystemExit):
+            logger.info("Scheduler interrupted")
         except Exception as e:
             logger.error(f"Error starting scheduler: {str(e)}")
 
@@ -63,3 +241,9 @@ class ChurchDataUpdater:
             logger.info("Scheduler stopped successfully")
         except Exception as e:
             logger.error(f"Error stopping scheduler: {str(e)}")
+
+
+if __name__ == '__main__':
+    # Standalone worker: keeps crawling out of the web processes
+    updater = ChurchDataUpdater(blocking=True)
+    updater.start()
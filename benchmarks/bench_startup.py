@@ -0,0 +1,58 @@
+"""Measure how long a fresh web process takes to import the app.
+
+Reports the default import of app.py, and the same import followed by
+loading the Google client libraries that the cache warm-up pulls in after
+a gunicorn worker boots.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REPORT = (
+    "import resource; "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "
+    "'googleapiclient' in sys.modules)"
+)
+PROBES = {
+    'import app': "import sys; import app; " + REPORT,
+    'import app + google clients': (
+        "import sys; import app; "
+        "import google.oauth2.service_account, googleapiclient.discovery, google_auth_httplib2; "
+        + REPORT
+    ),
+}
+
+
+def run_once(probe):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+    max_rss, google_loaded = result.stdout.split()[-2:]
+    return elapsed, int(max_rss), google_loaded == 'True'
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for label, probe in PROBES.items():
+        results = [run_once(probe) for _ in range(runs)]
+        times = [elapsed * 1000 for elapsed, _, _ in results]
+
+        print(f"{label} ({runs} runs)")
+        print(f"  median: {statistics.median(times):.1f} ms")
+        print(f"  min:    {min(times):.1f} ms")
+        print(f"  max:    {max(times):.1f} ms")
+        print(f"  max RSS: {max(rss for _, rss, _ in results) / 1024:.1f} MB")
+        print(f"  google client imported: {results[-1][2]}")
+
+
+if __name__ == '__main__':
+    main()
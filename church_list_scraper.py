@@ -6,6 +6,8 @@ import logging
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut
 import time
+from datetime import date
+from church_matcher import assign_known_ids, deduplicate_churches, is_church_id
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -105,14 +107,40 @@ class ChurchListScraper:
             logger.error(f"Error getting church details from {url}: {str(e)}")
             return None
 
+    def load_sheet_churches(self):
+        """Load the churches currently in the sheet, including their IDs."""
+        try:
+            result = self.sheets_service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range='A2:H'
+            ).execute()
+        except Exception as e:
+            logger.error(f"Error reading sheet: {str(e)}")
+            return []
+
+        churches = []
+        for row in result.get('values', []):
+            row = row + [''] * (8 - len(row))
+            churches.append({
+                'name': row[0],
+                'address': row[1],
+                'mass_times': row[2],
+                'url': row[3],
+                'lat': row[4] or None,
+                'lng': row[5] or None,
+                'id': row[7].strip() if is_church_id(row[7]) else None
+            })
+        return churches
+
     def update_sheet(self, churches):
         """Update Google Sheet with church data."""
         try:
             # Prepare the data
             values = [
-                ['Tên nhà thờ', 'Địa chỉ', 'Giờ lễ', 'URL', 'Latitude', 'Longitude']
+                ['Tên nhà thờ', 'Địa chỉ', 'Giờ lễ', 'URL', 'Latitude', 'Longitude', 'Last Updated', 'ID']
             ]
             
+            today = date.today().isoformat()
             for church in churches:
                 values.append([
                     church['name'],
@@ -120,13 +148,15 @@ class ChurchListScraper:
                     church['mass_times'],
                     church['url'],
                     church['lat'] if church['lat'] else '',
-                    church['lng'] if church['lng'] else ''
+                    church['lng'] if church['lng'] else '',
+                    today,
+                    church['id']
                 ])
             
             # Clear existing data
             self.sheets_service.spreadsheets().values().clear(
                 spreadsheetId=self.spreadsheet_id,
-                range='A1:F'
+                range='A1:H'
             ).execute()
             
             # Update with new data
@@ -145,8 +175,12 @@ class ChurchListScraper:
             logger.error(f"Error updating sheet: {str(e)}")
             return 0
 
-    def run(self):
-        """Run the scraper and update the sheet."""
+    def run(self, can_write=None):
+        """Run the scraper and update the sheet.
+
+        can_write is checked right before the sheet is rewritten; if it
+        returns False the scraped data is discarded instead of written.
+        """
         logger.info("Starting church list scraper...")
         
         # Get all church links
@@ -164,6 +198,15 @@ class ChurchListScraper:
         
         logger.info(f"Successfully scraped {len(churches)} churches")
         
+        # Reuse the IDs already in the sheet, then merge name variants
+        churches = assign_known_ids(churches, self.load_sheet_churches())
+        churches = deduplicate_churches(churches)
+        logger.info(f"{len(churches)} churches after deduplication")
+        
+        if can_write is not None and not can_write():
+            logger.error("Not allowed to write the sheet any more, discarding scraped data")
+            return 0
+        
         # Update sheet
         updated_count = self.update_sheet(churches)
         logger.info(f"Updated sheet with {updated_count} churches")
@@ -0,0 +1,204 @@
+import hashlib
+import math
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# Prefixes that name the same parish in different ways, e.g.
+# "Nhà thờ Tân Định" / "Giáo xứ Tân Định". Longest first so that
+# "giao xu" does not shadow "giao xu nha tho".
+NAME_PREFIXES = [
+    'nha tho chinh toa',
+    'nha tho giao xu',
+    'giao xu nha tho',
+    'nha tho',
+    'giao xu',
+    'giao ho',
+    'nha nguyen',
+    'tu vien',
+]
+
+# Grid cell size in degrees used for the spatial blocking index (~1.1km)
+GRID_SIZE = 0.01
+EARTH_RADIUS_KM = 6371
+
+
+def normalize_vietnamese(text):
+    """Lowercase, strip diacritics and punctuation from Vietnamese text."""
+    if not text:
+        return ''
+    text = text.lower().replace('đ', 'd')
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    text = re.sub(r'[^a-z0-9]+', ' ', text)
+    return ' '.join(text.split())
+
+
+def normalize_church_name(name):
+    """Normalize a church name and drop generic prefixes like 'Nhà thờ'."""
+    normalized = normalize_vietnamese(name)
+    for prefix in NAME_PREFIXES:
+        if normalized == prefix:
+            break
+        if normalized.startswith(prefix + ' '):
+            normalized = normalized[len(prefix) + 1:]
+            break
+    return normalized
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in km."""
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = (math.sin(d_lat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(d_lng / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def _coordinates(church):
+    """Return (lat, lng) as floats, or None if missing or invalid."""
+    try:
+        lat = float(church.get('lat'))
+        lng = float(church.get('lng'))
+    except (TypeError, ValueError):
+        return None
+    return lat, lng
+
+
+def make_church_id(name, address=None):
+    """Build a canonical ID for a church seen for the first time.
+
+    IDs are persisted with the records and reused on later runs, so this is
+    only called for new churches and does not depend on coordinates.
+    """
+    key = f"{normalize_church_name(name)}|{normalize_vietnamese(address)}"
+    return 'ch_' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+
+def is_church_id(value):
+    """Return True if value looks like an ID built by make_church_id."""
+    return bool(re.fullmatch(r'ch_[0-9a-f]{12}(_\d+)?', (value or '').strip()))
+
+
+class ChurchMatcher:
+    """Resolve church records from different sources to canonical IDs.
+
+    Candidates are blocked by grid cell (plus neighbouring cells) so each
+    record is only compared against churches nearby, and records without
+    coordinates are blocked by their normalized name.
+    """
+
+    def __init__(self, max_distance_km=0.5, min_similarity=0.9):
+        self.max_distance_km = max_distance_km
+        self.min_similarity = min_similarity
+        self.churches = {}
+        self.grid = {}
+        self.names = {}
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / GRID_SIZE), math.floor(lng / GRID_SIZE)
+
+    def _candidates(self, name_key, coords):
+        """Yield IDs of indexed churches that could match."""
+        seen = set()
+        for church_id in self.names.get(name_key, ()):
+            seen.add(church_id)
+            yield church_id
+        if coords is None:
+            return
+        row, col = self._cell(*coords)
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                for church_id in self.grid.get((row + d_row, col + d_col), ()):
+                    if church_id not in seen:
+                        seen.add(church_id)
+                        yield church_id
+
+    def _is_match(self, name_key, coords, address, candidate):
+        candidate_key = normalize_church_name(candidate.get('name'))
+        candidate_coords = _coordinates(candidate)
+
+        if coords is None or candidate_coords is None:
+            # Many parishes share a patron saint's name, so without coordinates
+            # on both sides require the same name and the same address
+            address_key = normalize_vietnamese(address)
+            return (name_key == candidate_key and bool(address_key) and
+                    address_key == normalize_vietnamese(candidate.get('address')))
+
+        if haversine_km(*coords, *candidate_coords) > self.max_distance_km:
+            return False
+
+        if name_key == candidate_key:
+            return True
+        return SequenceMatcher(None, name_key, candidate_key).ratio() >= self.min_similarity
+
+    def find(self, church):
+        """Return the canonical ID of an indexed church matching this one."""
+        name_key = normalize_church_name(church.get('name'))
+        if not name_key:
+            return None
+        coords = _coordinates(church)
+        for church_id in self._candidates(name_key, coords):
+            if self._is_match(name_key, coords, church.get('address'), self.churches[church_id]):
+                return church_id
+        return None
+
+    def add(self, church):
+        """Index a church, assigning a canonical ID if it has none.
+
+        Returns the church ID and whether the record was new. Duplicates are
+        merged into the existing record, filling in missing fields.
+        """
+        church_id = self.find(church)
+        if church_id is not None:
+            existing = self.churches[church_id]
+            for key, value in church.items():
+                if key != 'id' and existing.get(key) in (None, '', []):
+                    existing[key] = value
+            return church_id, False
+
+        coords = _coordinates(church)
+        church_id = church.get('id') or make_church_id(
+            church.get('name'), church.get('address'))
+        # Guard against hash collisions between distinct churches
+        base_id, suffix = church_id, 1
+        while church_id in self.churches:
+            suffix += 1
+            church_id = f"{base_id}_{suffix}"
+
+        record = dict(church, id=church_id)
+        self.churches[church_id] = record
+        self.names.setdefault(normalize_church_name(record.get('name')), []).append(church_id)
+        if coords is not None:
+            self.grid.setdefault(self._cell(*coords), []).append(church_id)
+        return church_id, True
+
+    def records(self):
+        """Return the deduplicated churches in insertion order."""
+        return list(self.churches.values())
+
+
+def assign_known_ids(churches, known_churches, **kwargs):
+    """Copy persisted IDs from previously saved records onto fresh ones.
+
+    Fresh records keep their own fields, so updated data such as mass times
+    is not overwritten, only the ID carries over.
+    """
+    matcher = ChurchMatcher(**kwargs)
+    for church in known_churches:
+        if church.get('id'):
+            matcher.add(church)
+    for church in churches:
+        church_id = matcher.find(church)
+        if church_id is not None:
+            church['id'] = church_id
+    return churches
+
+
+def deduplicate_churches(churches, **kwargs):
+    """Collapse duplicate church records and assign canonical IDs."""
+    matcher = ChurchMatcher(**kwargs)
+    for church in churches:
+        matcher.add(church)
+    return matcher.records()
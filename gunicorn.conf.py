@@ -0,0 +1,8 @@
+# Loaded automatically by gunicorn from the working directory
+
+
+def post_worker_init(worker):
+    # Warm the church cache once the worker has loaded the app, so importing
+    # app.py stays free of network calls and Google client imports
+    from app import warm_cache_in_background
+    warm_cache_in_background()
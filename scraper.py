@@ -5,6 +5,7 @@ import json
 import os
 import re
 from datetime import datetime
+from church_matcher import ChurchMatcher
 
 class ChurchScraper:
     def __init__(self):
@@ -176,6 +177,15 @@ class ChurchScraper:
         existing_churches = self.load_churches_data()
         existing_urls = {church['url'] for church in existing_churches}
         
+        # Index existing churches so name variants resolve to the same ID.
+        # Assigning a missing ID or merging a duplicate also needs a save.
+        matcher = ChurchMatcher()
+        ids_changed = False
+        for church in existing_churches:
+            _, is_new = matcher.add(church)
+            if not is_new or not church.get('id'):
+                ids_changed = True
+        
         # Get all church links
         print("Fetching church links...")
         links = self.get_church_links()
@@ -188,15 +198,17 @@ class ChurchScraper:
                 print(f"Processing church {i}/{len(links)}: {link}")
                 church_data = self.get_church_details(link)
                 if church_data:
-                    new_churches.append(church_data)
-                    print(f"Added: {church_data['name']}")
+                    church_id, is_new = matcher.add(church_data)
+                    if is_new:
+                        new_churches.append(church_data)
+                        print(f"Added: {church_data['name']} ({church_id})")
+                    else:
+                        ids_changed = True
+                        print(f"Duplicate of {church_id}: {church_data['name']}")
                     
-        # Combine existing and new data
-        all_churches = existing_churches + new_churches
-        
         # Save updated data
-        if new_churches:
-            self.save_churches_data(all_churches)
+        if new_churches or ids_changed:
+            self.save_churches_data(matcher.records())
         
         return len(new_churches)
 
@@ -0,0 +1,74 @@
+import bisect
+from church_matcher import normalize_vietnamese
+
+# Relative weight of a token hit in each indexed field
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'address': 1.0,
+}
+# Exact token hits rank above prefix-only hits
+EXACT_MATCH_BONUS = 0.5
+
+
+class SearchIndex:
+    """In-memory inverted index over church names and addresses.
+
+    Text is Vietnamese-normalized so "duc ba" finds "Đức Bà", and every
+    query token is matched as a prefix so results update while typing.
+    """
+
+    def __init__(self, churches=None):
+        self.churches = {}
+        self.postings = {}
+        self.tokens = []
+        if churches:
+            self.build(churches)
+
+    def build(self, churches):
+        """Rebuild the index from a list of churches keyed by their ID."""
+        self.churches = {}
+        self.postings = {}
+        for position, church in enumerate(churches):
+            church_id = church.get('id') or str(position)
+            self.churches[church_id] = church
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in normalize_vietnamese(church.get(field)).split():
+                    postings = self.postings.setdefault(token, {})
+                    postings[church_id] = max(postings.get(church_id, 0), weight)
+        self.tokens = sorted(self.postings)
+
+    def _prefix_tokens(self, prefix):
+        """Return indexed tokens starting with prefix using binary search."""
+        start = bisect.bisect_left(self.tokens, prefix)
+        end = bisect.bisect_left(self.tokens, prefix + '\uffff')
+        return self.tokens[start:end]
+
+    def search(self, query, limit=None):
+        """Return (church, score) pairs matching every query token, best first."""
+        query_tokens = normalize_vietnamese(query).split()
+        if not query_tokens:
+            return []
+
+        scores = None
+        for query_token in query_tokens:
+            token_scores = {}
+            for token in self._prefix_tokens(query_token):
+                bonus = EXACT_MATCH_BONUS if token == query_token else 0
+                for church_id, weight in self.postings[token].items():
+                    token_scores[church_id] = max(
+                        token_scores.get(church_id, 0), weight + bonus)
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {church_id: score + token_scores[church_id]
+                          for church_id, score in scores.items()
+                          if church_id in token_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(),
+                        key=lambda item: (-item[1], self.churches[item[0]].get('name', '')))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self.churches[church_id], score) for church_id, score in ranked]
@@ -4,6 +4,7 @@ from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from geopy.geocoders import Nominatim
 import json
+from church_matcher import ChurchMatcher
 
 class GoogleSheetsImporter:
     def __init__(self):
@@ -69,7 +70,9 @@ class GoogleSheetsImporter:
 
             # Load existing churches
             existing_churches = self._load_existing_churches()
-            existing_names = {church['name'] for church in existing_churches}
+            matcher = ChurchMatcher()
+            for church in existing_churches:
+                matcher.add(church)
             imported_count = 0
 
             # Process each row
@@ -78,10 +81,13 @@ class GoogleSheetsImporter:
                     continue
 
                 name = row[0].strip()
-                if name in existing_names:
+                address = row[1].strip()
+
+                # Skip churches already imported with the same name and
+                # address before spending a geocoding request on them
+                if matcher.find({'name': name, 'address': address}):
                     continue
 
-                address = row[1].strip()
                 mass_times = self._parse_mass_times(row[2])
                 
                 # Get coordinates
@@ -109,12 +115,14 @@ class GoogleSheetsImporter:
                     'url': row[5] if len(row) > 5 else None
                 }
 
-                existing_churches.append(church)
-                existing_names.add(name)
-                imported_count += 1
+                # Matched only once coordinates are known, so parishes
+                # sharing a name in different places stay separate
+                _, is_new = matcher.add(church)
+                if is_new:
+                    imported_count += 1
 
             # Save updated churches
-            self._save_churches(existing_churches)
+            self._save_churches(matcher.records())
             return imported_count
 
         except Exception as e: